@@ -5,13 +5,18 @@
 __program__ = "wre-commit"
 __version__ = "1.0.7"
 
-import glob
+import collections
+import fnmatch
+import functools
 import logging
+import mmap
 import os
 import re
+import signal
+import stat
 import subprocess
 import sys
-import tempfile
+import types
 
 
 class Program():
@@ -37,6 +42,24 @@ class Program():
         except ValueError:
             pass
 
+        self._parsed_opts = self._parse_opts(self.opts)
+
+    @classmethod
+    def _parse_opts(cls, opts):
+        """Map each option key to its first (position, value)."""
+        # both `key value` and `key=value`, the former wins on the same opt
+        parsed = {}
+        last = len(opts) - 1
+        for i, opt in enumerate(opts):
+            if i < last:
+                parsed.setdefault(opt, ((i, 0), opts[i + 1]))
+            try:
+                (key, value) = opt.split("=", 1)
+                parsed.setdefault(key, ((i, 1), value))
+            except ValueError:
+                pass
+        return parsed
+
     def print_help(self):
         """Print help."""
         print(
@@ -70,16 +93,11 @@ optional arguments:
 
     def get_option(self, keys, default=None):
         """Get option of given key(s) optionally with a default."""
-        last = len(self.opts) - 1
-        for i, opt in enumerate(self.opts):
-            if opt in keys and i < last:
-                return self.opts[i + 1]
-            try:
-                (key, value) = opt.split("=", 1)
-                if key in keys:
-                    return value
-            except ValueError:
-                pass
+        found = [
+            self._parsed_opts[key] for key in keys if key in self._parsed_opts
+        ]
+        if found:
+            return min(found)[1]
         return default
 
     @classmethod
@@ -92,19 +110,34 @@ optional arguments:
 class File():
     """Wrap file operation with friendly error messages."""
 
+    # pre-compile regular expressions
+    RE_GLOB_MAGIC = re.compile(r"[*?[]")
+
     # custom exception
     class Error(Exception):
         """Custom exception."""
 
     @classmethod
-    def read(cls, file):
-        """Get content of a file."""
+    def contains(cls, file, data):
+        """Does a file contain the data?"""
         try:
-            with open(file) as handler:
-                content = handler.read()
-        except IOError as exc:
+            with open(file, "rb") as handler:
+                if not os.fstat(handler.fileno()).st_size:
+                    return False
+                with mmap.mmap(
+                        handler.fileno(), 0, access=mmap.ACCESS_READ,
+                ) as mapped:
+                    return mapped.find(data) != -1
+        except (IOError, ValueError) as exc:
             raise cls.Error("Reading file {}: {}".format(file, exc))
-        return content
+
+    @classmethod
+    def lstat(cls, file):
+        """Get status of a file, not following symlinks, None if missing."""
+        try:
+            return os.lstat(file)
+        except OSError:
+            return None
 
     @classmethod
     def delete(cls, file):
@@ -124,6 +157,16 @@ class File():
                 "Renaming file {} to {}: {}".format(file_from, file_to, exc),
             )
 
+    @classmethod
+    def replace(cls, file_from, file_to):
+        """Rename a file, atomically replacing the target if exists."""
+        try:
+            return os.replace(file_from, file_to)
+        except OSError as exc:
+            raise cls.Error(
+                "Replacing file {} by {}: {}".format(file_to, file_from, exc),
+            )
+
     @classmethod
     def symlink(cls, file, symlink):
         """Create a symlink to a file."""
@@ -135,12 +178,33 @@ class File():
             )
 
     @classmethod
-    def chdir(cls, path):
-        """Change the current working directory."""
+    def glob(cls, pattern):
+        """Get sorted (path, stat) pairs of files matching the pattern."""
+        # patterns with a directory part are left to the glob module
+        if (
+                os.sep in pattern
+                or (os.altsep and os.altsep in pattern)
+                or not cls.RE_GLOB_MAGIC.search(pattern)
+        ):
+            import glob  # imported lazily, not needed in the common case
+            return [(path, None) for path in sorted(glob.glob(pattern))]
+
+        # list the current dir and stat its entries in a single pass,
+        #  hidden files are matched only explicitly as glob does
+        matches = []
         try:
-            os.chdir(path)
+            for entry in os.scandir(os.curdir):
+                if entry.name.startswith(".") and not pattern.startswith("."):
+                    continue
+                if fnmatch.fnmatch(entry.name, pattern):
+                    try:
+                        file_stat = entry.stat()
+                    except OSError:
+                        file_stat = None
+                    matches.append((entry.name, file_stat))
         except OSError as exc:
-            raise cls.Error("Changing directory to {}: {}".format(path, exc))
+            raise cls.Error("Listing files {}: {}".format(pattern, exc))
+        return sorted(matches, key=lambda match: match[0])
 
 
 class Command():
@@ -155,36 +219,61 @@ class Command():
 
     @classmethod
     def run(cls, *args, chdir=None):
-        """Run command with arguments."""
-        # change directory?
-        if chdir is not None:
-            old_dir = os.getcwd()
-            File.chdir(chdir)
+        """Run command with arguments, optionally in another directory.
 
-        # run the command
+        The output is returned as bytes, decoding is left to the caller.
+        """
+        # run the command, keep stderr out of the parsed output
         try:
-            output = subprocess.check_output(
-                args, stderr=subprocess.STDOUT
+            proc = subprocess.run(
+                args,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                cwd=chdir,
+                check=False,
             )  # nosec
-        except subprocess.CalledProcessError as exp:
+        except OSError as exc:
             raise cls.Error(
-                "Execution of command `{}` failed: {}".format(args[0], exp),
+                "Execution of command `{}` failed: {}".format(args[0], exc),
+            )
+        if proc.returncode:
+            raise cls.Error(
+                "Execution of command `{}` failed ({}): {}".format(
+                    args[0],
+                    proc.returncode,
+                    proc.stderr.decode(errors="replace").strip(),
+                ),
             )
 
-        # change directory back?
-        if chdir is not None:
-            File.chdir(old_dir)
-
-        return output.decode()
+        return proc.stdout
 
     @classmethod
     def which(cls, file):
         """Find executable in PATH."""
-        for path in os.environ["PATH"].split(os.pathsep):
-            executable = os.path.join(path, file)
-            if os.path.exists(executable) and os.access(executable, os.X_OK):
+        executable = cls._which(file, os.environ.get("PATH", os.defpath))
+        if executable is None:
+            raise cls.Error("Executable `{}`: not found".format(file))
+        return executable
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _which(file, path):
+        """Find executable in the given PATH, cached per PATH."""
+        for directory in path.split(os.pathsep):
+            executable = os.path.join(directory, file)
+
+            # a single stat per missing candidate, access() only for a match
+            try:
+                file_stat = os.stat(executable)
+            except OSError:
+                continue
+            if (
+                    stat.S_ISREG(file_stat.st_mode)
+                    and file_stat.st_mode & 0o111
+                    and os.access(executable, os.X_OK)
+            ):
                 return executable
-        raise cls.Error("Executable `{}`: not found".format(file))
+        return None
 
     @classmethod
     def shebang(cls, file):
@@ -215,20 +304,64 @@ class YAML():
     class Error(Exception):
         """Custom exception."""
 
+    # pre-compile regular expressions
+    RE_SEPARATOR = re.compile(r"^---[^\S\n]*$", re.MULTILINE)
+
+    # cache of split documents keyed by (file, mtime, size, preserve)
+    DOCS_CACHE_SIZE = 100
+    _docs_cache = collections.OrderedDict()
+
     @classmethod
-    def get_docs(cls, file, preserve_line_number=True):
+    def get_docs(cls, file, preserve_line_number=True, file_stat=None):
         """Split YAML document(s) into arrays of lines."""
-        docs = [""]
+        try:
+            if file_stat is None:
+                file_stat = os.stat(file)
+        except OSError as exc:
+            raise cls.Error("Config file {}: {}".format(file, exc))
+
+        # already split and unchanged since?
+        key = (
+            file, file_stat.st_mtime_ns, file_stat.st_size,
+            preserve_line_number,
+        )
+        if key in cls._docs_cache:
+            cls._docs_cache.move_to_end(key)
+            return list(cls._docs_cache[key])
+
+        docs = cls._split_docs(file, preserve_line_number)
+
+        # store, evicting the least recently used
+        cls._docs_cache[key] = docs
+        if len(cls._docs_cache) > cls.DOCS_CACHE_SIZE:
+            cls._docs_cache.popitem(last=False)
+
+        return list(docs)
+
+    @classmethod
+    def _split_docs(cls, file, preserve_line_number):
+        """Read and split YAML document(s) of a file."""
         try:
             with open(file) as handler:
-                for lines, line in enumerate(handler.readlines()):
-                    if line.rstrip() == "---" and docs[-1]:
-                        docs.append("")
-                        if preserve_line_number:
-                            docs[-1] += "\n" * lines
-                    docs[-1] += line
+                content = handler.read()
         except IOError as exc:
             raise cls.Error("Config file {}: {}".format(file, exc))
+
+        # a separator on the very first line does not start a new document
+        bounds = [0]
+        bounds.extend(
+            match.start() for match in cls.RE_SEPARATOR.finditer(content, 1)
+        )
+        bounds.append(len(content))
+
+        docs = []
+        lines = 0
+        for start, end in zip(bounds, bounds[1:]):
+            doc = content[start:end]
+            if preserve_line_number:
+                doc = "\n" * lines + doc
+            docs.append(doc)
+            lines += content.count("\n", start, end)
         return docs
 
 
@@ -254,20 +387,99 @@ class Hooks():
     class Error(Exception):
         """Custom exception."""
 
+    # environment variables affecting git dir discovery
+    GIT_DISCOVERY_ENVS = (
+        "GIT_DIR",
+        "GIT_COMMON_DIR",
+        "GIT_WORK_TREE",
+        "GIT_CEILING_DIRECTORIES",
+        "GIT_DISCOVERY_ACROSS_FILESYSTEM",
+    )
+
+    # git dirs already detected per git root
+    _git_dir_cache = {}
+
     @classmethod
     def _get_git_dir(cls, git_root="."):
         """Get git dir."""
+        if git_root not in cls._git_dir_cache:
+            git_dir = cls._find_git_dir(git_root)
+            if git_dir is None:
+                git_dir = cls._query_git_dir(git_root)
+            cls._git_dir_cache[git_root] = git_dir
+        return cls._git_dir_cache[git_root]
+
+    @classmethod
+    def _is_git_dir(cls, path):
+        """Does the path look like a git dir?"""
+        return (
+            os.path.isfile(os.path.join(path, "HEAD"))
+            and os.path.isdir(os.path.join(path, "objects"))
+            and os.path.isdir(os.path.join(path, "refs"))
+        )
+
+    @classmethod
+    def _find_git_dir(cls, git_root):
+        """Find plain .git directory in parents without spawning git."""
+        # leave environment overrides, worktrees and submodules to git
+        if any(env in os.environ for env in cls.GIT_DISCOVERY_ENVS):
+            return None
+
+        path = git_root
+        path_stat = os.stat(path)
+        device = path_stat.st_dev
+        while True:
+
+            # leave bare repositories (the path itself is a git dir) to git
+            if cls._is_git_dir(path):
+                return None
+
+            # leave anything but a valid .git directory to git
+            git_dir = os.path.join(path, ".git")
+            if os.path.exists(git_dir):
+                if os.path.isdir(git_dir) and cls._is_git_dir(git_dir):
+                    return os.path.normpath(git_dir)
+                return None
+
+            # stop at the root, leave crossing filesystems to git
+            #  as it stops there by default
+            parent = os.path.join(path, os.pardir)
+            parent_stat = os.stat(parent)
+            if os.path.samestat(parent_stat, path_stat):
+                return None
+            if parent_stat.st_dev != device:
+                return None
+            path, path_stat = parent, parent_stat
+
+    @classmethod
+    def _query_git_dir(cls, git_root):
+        """Query git dir from git."""
         opts = ("--git-common-dir", "--git-dir")
         output = Command.run("git", "rev-parse", chdir=git_root, *opts)
         for line, opt in zip(output.splitlines(), opts):
-            if line != opt:  # pragma: no branch (git < 2.5)
-                return os.path.normpath(os.path.join(git_root, line))
+            if line != opt.encode():  # pragma: no branch (git < 2.5)
+                return os.path.normpath(os.path.join(git_root, line.decode()))
         raise Command.Error("No git dir detected")
 
     @classmethod
     def _is_our_script(cls, file):
         """Is the file our script?"""
-        return File.read(file).find(cls.UNIQUE_SIGNATURE) != -1
+        # installed hooks are symlinks to our script
+        try:
+            if os.path.realpath(file) == os.path.realpath(
+                    Command.which(__program__),
+            ):
+                return True
+        except Command.Error:
+            pass
+
+        try:
+            return File.contains(file, cls.UNIQUE_SIGNATURE.encode())
+        except File.Error:
+            # a dangling symlink is not our script
+            if os.path.islink(file) and not os.path.exists(file):
+                return False
+            raise
 
     @classmethod
     def _split_hook_types(cls, hook_types=None):
@@ -293,16 +505,21 @@ class Hooks():
             hook_path, legacy_hook_path = cls._hook_paths(hook_type)
 
             # store previous hook?
-            if os.path.exists(hook_path) and not cls._is_our_script(hook_path):
+            if (
+                    File.lstat(hook_path) is not None
+                    and not cls._is_our_script(hook_path)
+            ):
                 File.rename(hook_path, legacy_hook_path)
                 print("Previous hook stored to {}".format(legacy_hook_path))
 
-            # delete old hook
-            if os.path.exists(hook_path):
-                File.delete(hook_path)
+            # install the hook aside, drop leftovers of an interrupted install
+            new_hook_path = "{}.new.{}".format(hook_path, __program__)
+            if File.lstat(new_hook_path) is not None:
+                File.delete(new_hook_path)
+            File.symlink(Command.which("wre-commit"), new_hook_path)
 
-            # install the hook
-            File.symlink(Command.which("wre-commit"), hook_path)
+            # ... and atomically replace our old hook, if any
+            File.replace(new_hook_path, hook_path)
             print("{} installed at {}".format(hook_type, hook_path))
 
         return 0
@@ -313,14 +530,15 @@ class Hooks():
         for hook_type in cls._split_hook_types(hook_types):
             hook_path, legacy_hook_path = cls._hook_paths(hook_type)
 
-            if os.path.exists(hook_path) and cls._is_our_script(hook_path):
+            hook_stat = File.lstat(hook_path)
+            if hook_stat is not None and cls._is_our_script(hook_path):
 
                 # remove the hook
                 File.delete(hook_path)
                 print("{} uninstalled".format(hook_type))
 
                 # restore previous hook?
-                if os.path.exists(legacy_hook_path):
+                if File.lstat(legacy_hook_path) is not None:
                     File.rename(legacy_hook_path, hook_path)
                     print("Restored previous hook to {}".format(hook_path))
 
@@ -330,8 +548,20 @@ class Hooks():
 class PreCommit():
     """Run pre-commit."""
 
+    # config key for the docker image
+    KEY_DOCKER_IMAGE = "### {}-docker-image".format(__program__)
+
+    # config key to run documents of a multi-doc config concurrently
+    KEY_PARALLEL = "### {}-parallel".format(__program__)
+
+    # config keys read by the wrapper
+    KEYS = (KEY_DOCKER_IMAGE, KEY_PARALLEL, "fail_fast")
+
     # pre-compile regular expressions
-    RE_KEY = re.compile(r"^([^:]+):([^#]+)")
+    RE_KEYS = re.compile(
+        r"^({}):([^#\n]+)".format("|".join(re.escape(key) for key in KEYS)),
+        re.MULTILINE,
+    )
 
     # is the program called by git?
     CALLED_BY_GIT = "GIT_AUTHOR_DATE" in os.environ
@@ -339,45 +569,54 @@ class PreCommit():
     # the current working directory
     PWD = os.getcwd()
 
-    # config key for the docker image
-    KEY_DOCKER_IMAGE = "### {}-docker-image".format(__program__)
-
     def __init__(self, name, opts, args, command):
         self.name = name
         self.opts = opts
         self.args = args
         self.command = command
 
-    def _compose_command_for_docker(self, docker_image):
-        """Compose command for precommit executed in Docker."""
+        # the same for every config, so compose them once
+        self._docker_args = self._compose_docker_args()
+
+    def _compose_docker_args(self):
+        """Compose docker arguments preceding the image."""
+        # hook pre-push from git requires to read from STDIN
+        # what breaks TTY and colors
+        if self.CALLED_BY_GIT and self.name == "pre-push":
+            tty_option = "-i"
+        else:
+            tty_option = "-t"
 
         # initial arguments
         # ... with read-write current dir visible on the same path,
-        run_args = [
+        return (
             "docker",
             "run",
-            "-t",
+            tty_option,
             "-v",
             "{pwd}/:{pwd}/:rw".format(pwd=self.PWD),
             "-w",
             self.PWD,
-            docker_image,
-            "pre-commit",
-        ]
-
-        # hook pre-push from git requires to read from STDIN
-        # what breaks TTY and colors
-        if self.CALLED_BY_GIT and self.name == "pre-push":
-            run_args[2] = "-i"
+        )
 
+    def _compose_command_for_docker(self, docker_image):
+        """Compose command for precommit executed in Docker."""
+        run_args = list(self._docker_args)
+        run_args.extend((docker_image, "pre-commit"))
         return run_args
 
     @classmethod
     def _compose_command_for_local(cls):
         """Compose command for locally executed pre-commit."""
+        return list(cls._get_local_command())
+
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _get_local_command():
+        """Get interpreter and executable of pre-commit, once per process."""
         executable = Command.which("pre-commit")
         interpreter = Command.shebang(executable)
-        return [interpreter, executable]
+        return (interpreter, executable)
 
     def _compose_args_for_git(self, config_file):
         """Compose arguments when called from git."""
@@ -393,34 +632,110 @@ class PreCommit():
         ]
 
     def _fix_config_option(self, config_file):
-        """Fix config option to the current config file."""
-        last = len(self.opts) - 1
-        for i, opt in enumerate(self.opts):
+        """Get options fixed to the current config file."""
+        opts = list(self.opts)
+        last = len(opts) - 1
+        for i, opt in enumerate(opts):
             if opt in ("-c", "--config") and i < last:
-                self.opts[i + 1] = config_file
+                opts[i + 1] = config_file
                 break
             if opt.split("=", 1)[0] in ("-c", "--config"):
-                self.opts[i] = opt.split("=", 1)[0] + "=" + config_file
+                opts[i] = opt.split("=", 1)[0] + "=" + config_file
                 break
         else:
             if self.command not in ["help"]:
-                self.opts.append("--config=" + config_file)
+                opts.append("--config=" + config_file)
+        return opts
 
-    def run(self, config_file, config_content):
-        """Run pre-commit over a single config file."""
-        # compose pre-commit execution and arguments
-        docker_image = None
-        fail_fast = False
+    @classmethod
+    @functools.lru_cache(maxsize=32)
+    def _get_config_values(cls, config_content):
+        """Get values of the wrapper keys from config, if any.
+
+        Cached, as a document is scanned by both is_parallel() and run(),
+        so a read-only mapping is returned.
+        """
+        # the last occurrence of each key wins, as the keys in comments
+        #  can be repeated, but any enabled fail fast is kept
+        values = {}
+        for match in cls.RE_KEYS.finditer(config_content):
+            (key, value) = (match.group(1), match.group(2).strip())
+            if key == "fail_fast" and values.get(key) == "true":
+                continue
+            values[key] = value
+        return types.MappingProxyType(values)
+
+    def is_parallel(self, docs):
+        """Can documents of a multi-doc config run concurrently?
+
+        Only when requested in the first document, no document asks
+        to fail fast and pre-commit does not stash unstaged changes,
+        i.e. a manual `run` with `--all-files` or `--files`.
+        """
+        # concurrent stashing would garble the work tree,
+        #  and pre-push hooks would compete for STDIN
+        if self.CALLED_BY_GIT or self.command != "run":
+            return False
+        if not any(
+                opt in ("-a", "--all-files", "--files")
+                or opt.startswith("--files=")
+                for opt in self.opts
+        ):
+            return False
+
+        if self._get_config_values(docs[0]).get(self.KEY_PARALLEL) != "true":
+            return False
+        return all(
+            self._get_config_values(doc).get("fail_fast") != "true"
+            for doc in docs
+        )
 
+    def run_parallel(self, config_file, docs):
+        """Run pre-commit over all documents of a config concurrently."""
+        import concurrent.futures  # imported lazily, rarely needed
+        import contextlib
+        import tempfile
+
+        with contextlib.ExitStack() as stack:
+
+            # each document needs its own temporary config file
+            handlers = []
+            for index, doc in enumerate(docs, 1):
+                handler = stack.enter_context(tempfile.NamedTemporaryFile(
+                    mode='w',
+                    prefix=".pre-commit-config-",
+                    suffix=".yaml",
+                    dir=os.getcwd(),
+                ))
+                handler.write(doc)
+                handler.flush()
+                logging.debug(
+                    "Extracted %d. document from %s to %s",
+                    index, config_file, handler.name
+                )
+                handlers.append(handler)
+
+            # the pre-commits are subprocesses, so threads are enough
+            with concurrent.futures.ThreadPoolExecutor(
+                    max_workers=min(len(docs), os.cpu_count() or 1),
+            ) as executor:
+                results = executor.map(
+                    lambda handler, doc: self.run(handler.name, doc),
+                    handlers,
+                    docs,
+                )
+                return max(retcode for (retcode, _) in results)
+
+    def run(self, config_file, config_content, replace_process=False):
+        """Run pre-commit over a single config file.
+
+        With `replace_process` the pre-commit replaces the current process,
+        so its exit code is returned directly to the caller.
+        """
         # get docker image and fail fast options from config, if any
-        for line in config_content.splitlines():
-            match = self.RE_KEY.match(line)
-            if match:
-                value = match.group(2).strip()
-                if match.group(1) == self.KEY_DOCKER_IMAGE:
-                    docker_image = value
-                elif match.group(1) == "fail_fast" and value == "true":
-                    fail_fast = True
+        values = self._get_config_values(config_content)
+        docker_image = values.get(self.KEY_DOCKER_IMAGE)
+        fail_fast = values.get("fail_fast") == "true"
 
         # run in docker?
         if docker_image:
@@ -434,17 +749,32 @@ class PreCommit():
         if self.CALLED_BY_GIT:
             run_args.extend(self._compose_args_for_git(config_file))
 
+            run_args.extend(self.opts)
+
         # called manually
         else:
-            self._fix_config_option(config_file)
+            run_args.extend(self._fix_config_option(config_file))
 
-        # append program options and arguments
-        run_args.extend(self.opts)
+        # append program arguments
         run_args.extend(self.args)
 
         # run the pre-commit finally
         logging.debug("Executing: %s", " ".join(run_args))
-        retcode = subprocess.call(run_args)  # nosec
+        if replace_process:
+            sys.stdout.flush()
+            sys.stderr.flush()
+
+            # restore signals ignored by Python, as subprocess does
+            for name in ("SIGPIPE", "SIGXFSZ"):
+                if hasattr(signal, name):
+                    signal.signal(getattr(signal, name), signal.SIG_DFL)
+
+            os.execvp(run_args[0], run_args)  # nosec
+
+        # no need to close fds, they are not inheritable since Python 3.4,
+        # and keeping them lets subprocess use the cheaper posix_spawn()
+        # when the executable is given with a path (the local pre-commit)
+        retcode = subprocess.call(run_args, close_fds=False)  # nosec
 
         return (retcode, fail_fast)
 
@@ -493,28 +823,50 @@ def main():
         option_config = program.get_option(
             ["-c", "--config"], default=".pre-commit-config*.yaml",
         )
-        for config_file in sorted(glob.glob(option_config)):
+        config_files = File.glob(option_config)
+        for config_index, (config_file, config_stat) in enumerate(
+                config_files, 1,
+        ):
 
             # get all documents of the config file
-            docs = YAML.get_docs(config_file)
+            docs = YAML.get_docs(config_file, file_stat=config_stat)
 
             # run pre-commit with the original config file?
             if len(docs) == 1:
-                (retcode, fail_fast) = pre_commit.run(config_file, docs[0])
+
+                # replace the process by the very last pre-commit
+                #  when nothing has failed so far
+                replace_process = (
+                    os.name == "posix"
+                    and (run_once or config_index == len(config_files))
+                    and not main_retcode
+                )
+                (retcode, fail_fast) = pre_commit.run(
+                    config_file, docs[0], replace_process=replace_process,
+                )
                 main_retcode = max(main_retcode, retcode)
                 if run_once or (retcode and fail_fast):
                     return main_retcode
 
             # else run pre-commit on split temporary config files
-            #  for each document
+            #  concurrently, when allowed by the config
+            elif not run_once and pre_commit.is_parallel(docs):
+                retcode = pre_commit.run_parallel(config_file, docs)
+                main_retcode = max(main_retcode, retcode)
+
+            # else run pre-commit on a split temporary config file
+            #  rewritten for each document
             else:
-                for index, doc in enumerate(docs, 1):
-                    with tempfile.NamedTemporaryFile(
-                            mode='w',
-                            prefix=".pre-commit-config-",
-                            suffix=".yaml",
-                            dir=os.getcwd(),
-                    ) as handler:
+                import tempfile  # imported lazily, rarely needed
+                with tempfile.NamedTemporaryFile(
+                        mode='w',
+                        prefix=".pre-commit-config-",
+                        suffix=".yaml",
+                        dir=os.getcwd(),
+                ) as handler:
+                    for index, doc in enumerate(docs, 1):
+                        handler.seek(0)
+                        handler.truncate()
                         handler.write(doc)
                         handler.flush()
                         logging.debug(